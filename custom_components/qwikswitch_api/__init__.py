@@ -7,7 +7,6 @@ https://github.com/rhanekom/hass-qwikswitch-api
 
 from __future__ import annotations
 
-import logging
 from typing import TYPE_CHECKING
 
 from homeassistant.const import CONF_EMAIL, Platform
@@ -21,20 +20,18 @@ from .const import (
     CONF_MASTER_KEY,
     CONF_POLL_FREQUENCY,
     CONF_VERSION,
-    DATA_COMMAND_QUEUE,
-    DATA_QS_CLIENT,
-    DATA_QS_COORDINATOR,
     DEFAULT_COMMAND_DELAY,
     DEFAULT_POLL_FREQUENCY,
-    DOMAIN,
+    LOGGER,
 )
 from .coordinator import QwikSwitchDataUpdateCoordinator
+from .data import QwikSwitchData
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
 
-_LOGGER = logging.getLogger(__name__)
+    from .data import QwikSwitchConfigEntry
 
 PLATFORMS: list[Platform] = [
     Platform.LIGHT,
@@ -45,7 +42,7 @@ PLATFORMS: list[Platform] = [
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
     hass: HomeAssistant,
-    entry: ConfigEntry,
+    entry: QwikSwitchConfigEntry,
 ) -> bool:
     """
     Set up QwikSwitch API from a config entry.
@@ -54,8 +51,6 @@ async def async_setup_entry(
     :param entry: Config entry to set up
     :return: True if setup was successful, False otherwise.
     """
-    hass.data.setdefault(DOMAIN, {})
-
     email: str = entry.data[CONF_EMAIL]
     master_key: str = entry.data[CONF_MASTER_KEY]
     poll_frequency: int = entry.options.get(
@@ -69,19 +64,23 @@ async def async_setup_entry(
         # Generate keys once at startup
         await hass.async_add_executor_job(qs_client.generate_api_keys)
     except QSError:
-        _LOGGER.exception("Failed to set up QwikSwitch API integration")
+        LOGGER.exception("Failed to set up QwikSwitch API integration")
         return False
 
     command_queue = QwikSwitchCommandQueue(qs_client, hass, command_delay=command_delay)
     command_queue.start()
 
-    # Store references
-    hass.data[DOMAIN][DATA_QS_CLIENT] = qs_client
-    hass.data[DOMAIN][DATA_COMMAND_QUEUE] = command_queue
-
     # Create the coordinator for periodic updates
-    coordinator = QwikSwitchDataUpdateCoordinator(hass, qs_client, poll_frequency)
-    hass.data[DOMAIN][DATA_QS_COORDINATOR] = coordinator
+    coordinator = QwikSwitchDataUpdateCoordinator(
+        hass, entry, command_queue, poll_frequency
+    )
+
+    # Store references on the entry itself; platforms read them from there.
+    entry.runtime_data = QwikSwitchData(
+        client=qs_client,
+        command_queue=command_queue,
+        coordinator=coordinator,
+    )
 
     # Perform first refresh to ensure data is available
     await coordinator.async_config_entry_first_refresh()
@@ -96,7 +95,7 @@ async def async_setup_entry(
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def async_unload_entry(hass: HomeAssistant, entry: QwikSwitchConfigEntry) -> bool:
     """
     Unload a QwikSwitch config entry.
 
@@ -108,22 +107,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         # Stop the background queue processor so it does not leak across an
         # unload/reload (a reload would otherwise spawn a second processor).
-        command_queue = hass.data[DOMAIN].pop(DATA_COMMAND_QUEUE, None)
-        if command_queue:
-            command_queue.stop()
-
-        qs_client = hass.data[DOMAIN].pop(DATA_QS_CLIENT, None)
-        if qs_client:
-            # Optionally delete keys if you do not want them to persist
-            try:
-                await hass.async_add_executor_job(qs_client.delete_api_keys)
-            except QSError as err:
-                _LOGGER.warning("Could not delete QwikSwitch API keys: %s", err)
-
-        hass.data[DOMAIN].pop(DATA_QS_COORDINATOR, None)
+        entry.runtime_data.command_queue.stop()
 
-        if not hass.data[DOMAIN]:
-            hass.data.pop(DOMAIN)
+        # Optionally delete keys if you do not want them to persist
+        try:
+            await hass.async_add_executor_job(entry.runtime_data.client.delete_api_keys)
+        except QSError as err:
+            LOGGER.warning("Could not delete QwikSwitch API keys: %s", err)
 
     return unload_ok
 
@@ -155,7 +145,7 @@ async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
         hass.config_entries.async_update_entry(
             config_entry, data=new_data, version=CONF_VERSION
         )
-        _LOGGER.info(
+        LOGGER.info(
             "Migrated QwikSwitch config entry from version %s to %s",
             config_entry.version,
             CONF_VERSION,
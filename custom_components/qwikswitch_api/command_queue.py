@@ -4,16 +4,26 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
+from collections import deque
 from enum import Enum
+from http import HTTPStatus
 from typing import TYPE_CHECKING, Final
 
 from attr import dataclass
+from qwikswitchapi.exceptions import (
+    QSError,
+    QSRequestError,
+    QSRequestFailedError,
+    QSResponseParseError,
+)
+
+from .const import LOGGER
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
     from qwikswitchapi.client import QSClient
-
-_LOGGER = logging.getLogger(__name__)
+    from qwikswitchapi.entities import DeviceStatus
 
 
 class CommandType(Enum):
@@ -23,21 +33,64 @@ class CommandType(Enum):
     POLL = "poll"
 
 
-@dataclass
+# Slotted, and compared by identity: the queue matches pending commands with `is`.
+@dataclass(slots=True, eq=False)
 class Command:
     """A command to be executed by the QwikSwitchCommandQueue."""
 
     cmd_type: CommandType
     device_id: str | None = None
-    data: dict = {}  # e.g. {"level": 42}, or {"done_fut": <Future>}  # noqa: RUF012
-    priority: int = 1
+    level: int = 0  # SET_DEVICE: the level to send
+    attempt: int = 0  # SET_DEVICE: how many earlier sends of it failed
+    done_fut: asyncio.Future | None = None  # POLL: resolved with the statuses
+
+
+# Seconds to collect rapid set-device calls (e.g. a dimmer slider drag) before
+# queueing a single command carrying the latest level.
+COALESCE_DELAY: Final = 0.1
+
+# A set-device call that fails in transport (timeout, connection error) or is
+# rate-limited or failed by the server (429, 5xx) is retried, backing off
+# exponentially from the current command interval.
+SET_DEVICE_ATTEMPTS: Final = 3
+MAX_RETRY_DELAY: Final = 30
+
+# When a call fails in a way worth retrying (see _is_retryable) the interval
+# between calls grows by INTERVAL_STEP seconds (up to MAX_INTERVAL), and halves
+# back towards the configured command_delay on each success.
+INTERVAL_STEP: Final = 1
+MAX_INTERVAL: Final = 30
+
+# QSRequestError has no status attribute; the status is only in its message.
+_STATUS_CODE: Final = re.compile(r'Status code: "(\d+)"')
 
 
-PRIORITY_COMMAND = 0  # device commands
-PRIORITY_POLL = 1  # poll commands
+def _is_retryable(err: Exception) -> bool:
+    """Return whether a failed call is worth sending again, after backing off."""
+    if isinstance(err, QSRequestFailedError):
+        return True
+    # Unparseable responses and error bodies would fail the same way again.
+    if isinstance(err, QSResponseParseError) or not isinstance(err, QSRequestError):
+        return False
+    match = _STATUS_CODE.search(str(err))
+    if match is None:
+        return False
+    status = int(match.group(1))
+    return (
+        status == HTTPStatus.TOO_MANY_REQUESTS
+        or status >= HTTPStatus.INTERNAL_SERVER_ERROR
+    )
 
-KEY_FUT: Final = "done_fut"
-KEY_LEVEL: Final = "level"
+
+def _retrieve_exception(fut: asyncio.Future) -> None:
+    """Mark a future's exception as retrieved, in case every awaiter went away."""
+    if not fut.cancelled():
+        fut.exception()
+
+
+def _poll_statuses(qs_client: QSClient) -> list[DeviceStatus]:
+    """Fetch all device statuses and unwrap the list, in the executor thread."""
+    return qs_client.get_all_device_status().statuses
 
 
 class QwikSwitchCommandQueue:
@@ -46,13 +99,22 @@ class QwikSwitchCommandQueue:
 
     A central queue that enforces:
       - Priority (device commands first, poll second).
-      - A user-configurable delay (command_delay) between calls to avoid rate-limits.
-      - Debouncing repeated commands.
-      - No retries: if a call fails, it just logs an error.
+      - A user-configurable minimum interval (command_delay) between calls to
+        avoid rate-limits, without delaying a call when the queue was idle.
+      - Debouncing repeated commands, with a short coalescing window so bursts
+        of set-device calls collapse into one command.
+      - Retries with exponential backoff for set-device calls that fail in
+        transport or with a 429/5xx, without holding up other commands; polls
+        are not retried, the next poll takes their place.
+      - Backing off the interval between calls while the API is failing.
     """
 
     def __init__(
-        self, qs_client: QSClient, hass: HomeAssistant, command_delay: int = 2
+        self,
+        qs_client: QSClient,
+        hass: HomeAssistant,
+        command_delay: int = 2,
+        coalesce_delay: float = COALESCE_DELAY,
     ) -> None:
         """
         Initialise the queue.
@@ -60,22 +122,47 @@ class QwikSwitchCommandQueue:
         :param qs_client: The Qwikswitch QSClient instance
         :param hass: HomeAssistant instance
         :param command_delay: The delay (in seconds) between commands (default=2)
+        :param coalesce_delay: Window (in seconds) for collapsing set-device calls
         """
         self._qs_client = qs_client
         self._hass = hass
-        self._command_delay = command_delay
-
-        # Priority queue storing (priority, cmd_type, device_id, optional data/future)
-        self._queue: asyncio.PriorityQueue[tuple[int, Command]] = (
-            asyncio.PriorityQueue()
-        )
-
-        # Store pending commands in a dict so we can update or discard duplicates
-        # Key: (cmd_type, device_id), Value: the Command
-        self._pending_commands: dict[tuple[CommandType, str | None], Command] = {}
+        self._coalesce_delay = coalesce_delay
+
+        # Priority is which deque a command sits in (device commands before
+        # polls): O(1) enqueue/dequeue and Commands are never compared.
+        self._commands: deque[Command] = deque()  # device commands
+        self._polls: deque[Command] = deque()  # poll commands
+        # Set while either deque holds a command; the loop waits on it.
+        self._has_item = asyncio.Event()
+        # The drained signal behind async_wait_idle: set once both deques are
+        # empty, no set-device call is waiting out its coalescing window or a
+        # retry, and no command is being processed.
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        # SET_DEVICE commands still waiting in the deque, by device id, so a
+        # repeated call updates them in place. A command leaves this dict when
+        # it is dequeued, so a command being sent is never changed under it.
+        self._queued_commands: dict[str | None, Command] = {}
+        # The result of the poll that is queued or in flight, shared by callers.
+        self._poll_fut: asyncio.Future[list[DeviceStatus]] | None = None
+
+        # Latest requested level per device, and the timer that will queue it.
+        self._latest_levels: dict[str, int] = {}
+        self._coalesce_handles: dict[str, asyncio.TimerHandle] = {}
+        # Timers that queue a failed set-device command again after its backoff.
+        self._retry_handles: dict[str, asyncio.TimerHandle] = {}
 
         self._processing_task: asyncio.Task | None = None
 
+        # Loop time before which the next API call must not start.
+        self._next_dispatch = 0.0
+        # _interval is the live spacing between calls; it backs off while the
+        # API fails and halves back down to the configured floor, which is
+        # fixed for the queue's lifetime.
+        self._min_interval: Final = command_delay
+        self._interval: float = command_delay
+
     def start(self) -> None:
         """Start the background task that processes items in this queue."""
         if not self._processing_task:
@@ -87,129 +174,246 @@ class QwikSwitchCommandQueue:
             self._processing_task.cancel()
             self._processing_task = None
 
-    async def enqueue_set_device(self, device_id: str, level: int) -> None:
+        for handle in (*self._coalesce_handles.values(), *self._retry_handles.values()):
+            handle.cancel()
+        self._coalesce_handles.clear()
+        self._retry_handles.clear()
+        self._latest_levels.clear()
+
+    async def async_wait_idle(self) -> None:
+        """
+        Wait until the queue is drained.
+
+        Returns once nothing is queued, coalescing, waiting to retry or being
+        sent, e.g. to observe the API calls made for a burst of commands.
+        """
+        await self._idle.wait()
+
+    def enqueue_set_device(self, device_id: str, level: int) -> None:
         """
         Enqueue or update a device command for (SET_DEVICE, device_id).
 
-        Debounce by overwriting any pending command for that device.
+        Never suspends, so it is a plain method; call it from the event loop.
+
+        Debounce by overwriting any queued command for that device. Otherwise
+        the level is held for a short coalescing window, so a burst of calls
+        queues a single command carrying the latest level.
         """
-        cmd_key = (CommandType.SET_DEVICE, device_id)
-        existing_cmd = self._pending_commands.get(cmd_key)
+        existing_cmd = self._queued_commands.get(device_id)
         if existing_cmd:
-            # Debounce: just update the level in the existing command
-            existing_cmd.data[KEY_LEVEL] = level
+            # Debounce: just update the level in the existing command. It may
+            # be a queued retry; the new level gets a full retry budget.
+            existing_cmd.level = level
+            existing_cmd.attempt = 0
+
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug(
+                    "Debounce: updated SET_DEVICE for device=%s to level=%s",
+                    device_id,
+                    level,
+                )
+            return
 
-            _LOGGER.debug(
-                "Debounce: updated SET_DEVICE for device=%s to level=%s",
-                device_id,
-                level,
-            )
-        else:
-            # Create a new Command
-            cmd = Command(
-                cmd_type=CommandType.SET_DEVICE,
-                device_id=device_id,
-                data={KEY_LEVEL: level},
-                priority=PRIORITY_COMMAND,
+        self._latest_levels[device_id] = level
+        if device_id not in self._coalesce_handles:
+            self._idle.clear()
+            self._coalesce_handles[device_id] = self._hass.loop.call_later(
+                self._coalesce_delay, self._flush_device, device_id
             )
-            self._pending_commands[cmd_key] = cmd
-            await self._queue.put((PRIORITY_COMMAND, cmd))
 
-    async def enqueue_poll(self) -> list:
+    def _flush_device(self, device_id: str) -> None:
+        """Queue a command with the latest level once the coalescing window ends."""
+        del self._coalesce_handles[device_id]
+        cmd = Command(
+            cmd_type=CommandType.SET_DEVICE,
+            device_id=device_id,
+            level=self._latest_levels.pop(device_id),
+        )
+        self._queued_commands[device_id] = cmd
+        self._put(self._commands, cmd)
+
+    def _retry_device(self, cmd: Command) -> None:
+        """Queue a failed set-device command again once its backoff ends."""
+        device_id = cmd.device_id
+        del self._retry_handles[device_id]
+        if self._is_superseded(device_id):
+            return
+        self._queued_commands[device_id] = cmd
+        self._put(self._commands, cmd)
+
+    def _is_superseded(self, device_id: str) -> bool:
+        """Return whether a newer level for the device is queued or coalescing."""
+        return device_id in self._queued_commands or device_id in self._latest_levels
+
+    async def enqueue_poll(self) -> list[DeviceStatus]:
         """
-        Enqueue or update a poll command.
+        Enqueue a poll command, or join the one already pending.
 
-        Debounce so multiple poll calls unify into one.
-        Return the same future if we have one pending.
+        All callers share a single future per poll. It is shielded so that one
+        caller being cancelled does not cancel the result for the others.
         """
-        cmd_key = (CommandType.POLL, None)
-        existing_cmd = self._pending_commands.get(cmd_key)
-        if existing_cmd:
-            # Already pending poll; reuse its future
-            done_fut = existing_cmd.data.get(KEY_FUT)
-            if done_fut is None:
-                # Shouldn't happen if we always store a future
-                done_fut = self._hass.loop.create_future()
-                existing_cmd.data[KEY_FUT] = done_fut
-            return await done_fut
-
-        # Create a new poll command with a future
-        done_fut = self._hass.loop.create_future()
-        cmd = Command(
-            cmd_type=CommandType.POLL,
-            device_id=None,
-            data={KEY_FUT: done_fut},
-            priority=PRIORITY_POLL,
-        )
-        self._pending_commands[cmd_key] = cmd
-        await self._queue.put((PRIORITY_POLL, cmd))
-        return await done_fut
+        if self._poll_fut is None:
+            self._poll_fut = self._hass.loop.create_future()
+            # Callers await it through shield(); if they are all cancelled,
+            # nothing else would retrieve a failure.
+            self._poll_fut.add_done_callback(_retrieve_exception)
+            cmd = Command(
+                cmd_type=CommandType.POLL,
+                device_id=None,
+                done_fut=self._poll_fut,
+            )
+            self._put(self._polls, cmd)
+        return await asyncio.shield(self._poll_fut)
+
+    def _put(self, commands: deque[Command], cmd: Command) -> None:
+        """Append a command to one of the deques and wake the processing loop."""
+        commands.append(cmd)
+        self._idle.clear()
+        self._has_item.set()
+
+    def _pop(self) -> Command:
+        """Take the next command off the deques, device commands before polls."""
+        if self._commands:
+            cmd = self._commands.popleft()
+            # Later levels for this device now start a new command.
+            del self._queued_commands[cmd.device_id]
+        else:
+            cmd = self._polls.popleft()
+        if not self._commands and not self._polls:
+            self._has_item.clear()
+        return cmd
 
     async def _process_loop(self) -> None:
         """
         Process commands in priority order in this main loop.
 
-        After each command, wait self._command_delay seconds.
-        Debounced commands are updated in _pending_commands until removed here.
+        API calls start at least self._interval seconds apart; the loop only
+        sleeps when the previous call started more recently than that.
+        Debounced commands are updated in _queued_commands until dequeued here.
         """
+        loop = self._hass.loop
         while True:
-            _, cmd = await self._queue.get()
-            cmd_key = (cmd.cmd_type, cmd.device_id)
+            await self._has_item.wait()
+            # Sleep before choosing a command, so one queued meanwhile with a
+            # higher priority still goes first.
+            wait = self._next_dispatch - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            cmd = self._pop()
 
+            self._next_dispatch = loop.time() + self._interval
             try:
-                await self._handle_command(cmd)
-                # Wait after each command to avoid rate-limit
-                await asyncio.sleep(self._command_delay)
+                sent = await self._handle_command(cmd)
 
             except asyncio.CancelledError:
                 raise
             except Exception as exc:
-                _LOGGER.exception(
-                    "Error processing %s cmd (device=%s): %s",
-                    cmd.cmd_type,
-                    cmd.device_id,
-                    exc,  # noqa: TRY401
+                if _is_retryable(exc):
+                    self._widen_interval()
+                LOGGER.exception(
+                    "Error processing %s cmd (device=%s)", cmd.cmd_type, cmd.device_id
                 )
-                # If it's a poll, set an exception so the caller sees a failure
-                if cmd.cmd_type == CommandType.POLL:
-                    done_fut = cmd.data.get(KEY_FUT)
-                    if done_fut and not done_fut.done():
-                        done_fut.set_exception(exc)
+                # If it's a poll, set an exception so the callers see a failure
+                done_fut = cmd.done_fut
+                if done_fut and not done_fut.done():
+                    done_fut.set_exception(exc)
+
+            else:
+                if sent:
+                    # Multiplicative decrease back towards the configured delay.
+                    self._interval = max(self._min_interval, self._interval / 2)
+                else:
+                    # The call failed, but a retry was scheduled in its place.
+                    self._widen_interval()
 
             finally:
-                # Always remove this command from _pending_commands if it's still there
-                pending_cmd = self._pending_commands.get(cmd_key)
-                if pending_cmd is cmd:
-                    del self._pending_commands[cmd_key]
-
-                self._queue.task_done()
+                # The next enqueue_poll starts a fresh poll once this one is done.
+                if cmd.done_fut is self._poll_fut:
+                    self._poll_fut = None
+
+                if not (
+                    self._has_item.is_set()
+                    or self._coalesce_handles
+                    or self._retry_handles
+                ):
+                    self._idle.set()
+
+    def _widen_interval(self) -> None:
+        """Additive increase of the call interval while the API is struggling."""
+        self._interval = min(MAX_INTERVAL, self._interval + INTERVAL_STEP)
+
+    async def _handle_command(self, cmd: Command) -> bool:
+        """
+        Decide which specialized handler to call based on cmd_type.
 
-    async def _handle_command(self, cmd: Command) -> None:
-        """Decide which specialized handler to call based on cmd_type."""
+        Returns False if the call failed and was left to a retry instead of
+        raising.
+        """
         if cmd.cmd_type == CommandType.SET_DEVICE and cmd.device_id is not None:
-            await self._handle_set_device(cmd)
-        elif cmd.cmd_type == CommandType.POLL:
+            return await self._handle_set_device(cmd)
+        if cmd.cmd_type == CommandType.POLL:
             await self._handle_poll(cmd)
         # else: possibly handle more CommandTypes
+        return True
+
+    async def _handle_set_device(self, cmd: Command) -> bool:
+        """
+        Handle a set-device command.
 
-    async def _handle_set_device(self, cmd: Command) -> None:
-        """Handle a set-device command."""
+        Retryable failures are sent again up to SET_DEVICE_ATTEMPTS times in
+        all. The retry waits on a timer rather than in the loop, so other
+        commands and polls go out during the backoff. A retry is dropped once a
+        newer level for the device is requested, so a stale level is never
+        sent after it.
+
+        Returns False when the call failed and was left to a retry (or to a
+        newer level), so the loop still backs off.
+        """
         device_id = cmd.device_id
-        level = cmd.data.get(KEY_LEVEL, 0)
+        if device_id is None:
+            LOGGER.error("Device ID is None for SET_DEVICE command")
+            return True
+
+        # This command is newer than any retry still waiting for the device.
+        if (pending := self._retry_handles.pop(device_id, None)) is not None:
+            pending.cancel()
 
-        if device_id is not None:
+        try:
             # Run in an executor to avoid blocking
             await self._hass.async_add_executor_job(
-                self._qs_client.control_device, device_id, level
+                self._qs_client.control_device,
+                device_id,
+                cmd.level,
             )
-        else:
-            _LOGGER.error("Device ID is None for SET_DEVICE command")
+        except QSError as err:
+            if cmd.attempt == SET_DEVICE_ATTEMPTS - 1 or not _is_retryable(err):
+                raise
+            if not self._is_superseded(device_id):
+                self._schedule_retry(device_id, cmd, err)
+            return False
+        return True
+
+    def _schedule_retry(self, device_id: str, cmd: Command, err: QSError) -> None:
+        """Queue the command again after an exponential backoff."""
+        delay = min(MAX_RETRY_DELAY, self._interval * 2**cmd.attempt)
+        cmd.attempt += 1
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(
+                "Retrying SET_DEVICE for device=%s in %ss: %s",
+                device_id,
+                delay,
+                err,
+            )
+        self._retry_handles[device_id] = self._hass.loop.call_later(
+            delay, self._retry_device, cmd
+        )
 
     async def _handle_poll(self, cmd: Command) -> None:
         """Handle a poll command, returning data to done_fut if provided."""
-        done_fut = cmd.data.get(KEY_FUT)
+        done_fut = cmd.done_fut
         statuses = await self._hass.async_add_executor_job(
-            self._qs_client.get_all_device_status
+            _poll_statuses, self._qs_client
         )
         if done_fut and not done_fut.done():
-            done_fut.set_result(statuses.statuses)
+            done_fut.set_result(statuses)
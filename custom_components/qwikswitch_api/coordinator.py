@@ -2,20 +2,52 @@
 
 from __future__ import annotations
 
-import logging
+import sys
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from qwikswitchapi.entities import DeviceStatus
 
-from .const import DATA_COMMAND_QUEUE, DOMAIN
+from .const import LOGGER
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
-    from qwikswitchapi.client import QSClient
+    from qwikswitchapi.constants import DeviceClass
 
-_LOGGER = logging.getLogger(__name__)
+    from .command_queue import QwikSwitchCommandQueue
+    from .data import QwikSwitchConfigEntry
+
+
+class DeviceStatusList(list[DeviceStatus]):
+    """
+    A list of DeviceStatus objects that compares by what the entities display.
+
+    DeviceStatus does not implement __eq__, so two polls returning identical
+    device states would never compare equal as plain lists. Comparing on
+    (device_id, device_type, value) lets the coordinator's always_update=False
+    skip listener callbacks when nothing visible has changed; rssi/epoch churn
+    is deliberately ignored since no entity exposes it.
+    """
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two status lists by device id, type and value."""
+        if not isinstance(other, DeviceStatusList):
+            return NotImplemented
+        return self._state() == other._state()
+
+    def __ne__(self, other: object) -> bool:
+        """Inverse of __eq__ (list defines its own __ne__, so override it too)."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    # Like list itself, a status list is mutable and therefore unhashable.
+    __hash__ = None  # type: ignore[assignment]
+
+    def _state(self) -> list[tuple[str, str, int]]:
+        """Return the comparable state of each device, in order."""
+        return [(status.device_id, status.device_type, status.value) for status in self]
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
@@ -23,28 +55,48 @@ class QwikSwitchDataUpdateCoordinator(DataUpdateCoordinator[list[DeviceStatus]])
     """
     Coordinator to fetch data from the QwikSwitch API at a specified interval.
 
-    The `.data` property will be a list of DeviceStatus objects.
+    The `.data` property will be a list of DeviceStatus objects, `.data_by_id`
+    indexes the same statuses by device id and `.by_class` groups them by
+    device class. `.changed_ids` holds the devices whose value changed in the
+    latest poll.
     """
 
+    config_entry: QwikSwitchConfigEntry
+
     def __init__(
-        self, hass: HomeAssistant, qs_client: QSClient, poll_frequency: int
+        self,
+        hass: HomeAssistant,
+        config_entry: QwikSwitchConfigEntry,
+        command_queue: QwikSwitchCommandQueue,
+        poll_frequency: int,
     ) -> None:
         """
         Initialize the QwikSwitch coordinator.
 
         :param hass: HomeAssistant instance
-        :param qs_client: QSClient instance
+        :param config_entry: The config entry this coordinator belongs to
+        :param command_queue: The command queue that polls are sent through
         :param poll_frequency: Poll interval in seconds.
         """
-        self._qs_client = qs_client
-        self._hass = hass
+        self._command_queue = command_queue
         update_interval = timedelta(seconds=poll_frequency)
 
+        # Rebuilt once per refresh so entities look up their status in O(1)
+        # instead of scanning the whole list on every property read.
+        self.data_by_id: dict[str, DeviceStatus] = {}
+        self.by_class: dict[DeviceClass, list[DeviceStatus]] = {}
+        self.changed_ids: set[str] = set()
+        # Where each device sits in `.data` and in its `.by_class` list.
+        self._positions: dict[str, tuple[int, int]] = {}
+
         super().__init__(
             hass,
-            _LOGGER,
+            LOGGER,
+            config_entry=config_entry,
             name="qwikswitch_api_coordinator",
             update_interval=update_interval,
+            # Only notify entities when a poll actually changed something.
+            always_update=False,
         )
 
     async def _async_update_data(self) -> list[DeviceStatus]:
@@ -54,12 +106,96 @@ class QwikSwitchDataUpdateCoordinator(DataUpdateCoordinator[list[DeviceStatus]])
         :return: A list of DeviceStatus objects.
         :raises UpdateFailed: if fetching data fails.
         """
-        command_queue = self._hass.data[DOMAIN][DATA_COMMAND_QUEUE]
-
         try:
-            device_statuses = await command_queue.enqueue_poll()
+            device_statuses = await self._command_queue.enqueue_poll()
         except Exception as err:
             message = f"Error fetching QwikSwitch data: {err}"
             raise UpdateFailed(message) from err
         else:
-            return device_statuses
+            self._index_statuses(device_statuses)
+            return DeviceStatusList(device_statuses)
+
+    def _index_statuses(self, device_statuses: list[DeviceStatus]) -> None:
+        """
+        Rebuild the indexes and work out which devices changed, in one pass.
+
+        After a failed refresh every device counts as changed, so entities
+        write their state again as they become available.
+
+        :param device_statuses: The statuses returned by the latest poll.
+        """
+        previous = self.data_by_id if self.last_update_success else {}
+        changed_ids: set[str] = set()
+        data_by_id: dict[str, DeviceStatus] = {}
+        by_class: dict[DeviceClass, list[DeviceStatus]] = {}
+        positions: dict[str, tuple[int, int]] = {}
+        for index, status in enumerate(device_statuses):
+            # Interned so the key is the same object as each entity's device id.
+            device_id = sys.intern(status.device_id)
+            data_by_id[device_id] = status
+            same_class = by_class.setdefault(status.device_class, [])
+            positions[device_id] = (index, len(same_class))
+            same_class.append(status)
+
+            old_status = previous.get(device_id)
+            if old_status is None or old_status.value != status.value:
+                changed_ids.add(device_id)
+
+        # Devices that disappeared from the poll changed too.
+        changed_ids.update(previous.keys() - data_by_id.keys())
+
+        self.data_by_id = data_by_id
+        self.by_class = by_class
+        self.changed_ids = changed_ids
+        self._positions = positions
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """
+        Notify only the listeners whose device changed in the latest poll.
+
+        Entities register with their device id as listener context. After a
+        failed refresh every listener is notified so entities can show as
+        unavailable; listeners registered without a context always are.
+        """
+        if not self.last_update_success:
+            super().async_update_listeners()
+            return
+
+        changed_ids = self.changed_ids
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context in changed_ids:
+                update_callback()
+
+    @callback
+    def async_set_device_value(self, device_id: str, value: int) -> None:
+        """
+        Optimistically record a commanded value for a device.
+
+        The status is replaced in place in `.data` and both indexes, without
+        notifying listeners: only the entity that sent the command needs to
+        write its state. The next poll confirms or corrects the value, and
+        because `.data` already holds it, a confirming poll compares equal and
+        triggers no further state writes.
+
+        :param device_id: The device that was commanded
+        :param value: The commanded value (0..100)
+        """
+        status = self.data_by_id.get(device_id)
+        if status is None:
+            LOGGER.debug("Ignoring optimistic value for unknown device=%s", device_id)
+            return
+
+        # DeviceStatus is read-only, so swap in a copy carrying the new value.
+        updated = DeviceStatus(
+            status.device_id,
+            status.device_type,
+            status.firmware,
+            status.epoch,
+            status.rssi,
+            value,
+        )
+        data_index, class_index = self._positions[device_id]
+        self.data[data_index] = updated
+        self.data_by_id[device_id] = updated
+        self.by_class[status.device_class][class_index] = updated
@@ -0,0 +1,25 @@
+"""Custom types for qwikswitch_api."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from qwikswitchapi.client import QSClient
+
+    from .command_queue import QwikSwitchCommandQueue
+    from .coordinator import QwikSwitchDataUpdateCoordinator
+
+
+type QwikSwitchConfigEntry = ConfigEntry[QwikSwitchData]
+
+
+@dataclass
+class QwikSwitchData:
+    """Runtime objects for a loaded config entry, stored on entry.runtime_data."""
+
+    client: QSClient
+    command_queue: QwikSwitchCommandQueue
+    coordinator: QwikSwitchDataUpdateCoordinator
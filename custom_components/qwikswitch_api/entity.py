@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-import logging
-from typing import TYPE_CHECKING
+import sys
+from typing import TYPE_CHECKING, Final
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .coordinator import QwikSwitchDataUpdateCoordinator
@@ -14,12 +15,16 @@ if TYPE_CHECKING:
 
     from .command_queue import QwikSwitchCommandQueue
 
-_LOGGER = logging.getLogger(__name__)
+_UNIQUE_ID_PREFIX: Final = "qwikswitch_"
 
 
 class QwikSwitchBaseEntity(CoordinatorEntity[QwikSwitchDataUpdateCoordinator]):
     """Base Entity using a DataUpdateCoordinator and optimistic updates."""
 
+    # HA's Entity keeps a __dict__ (cached properties live there), so only our
+    # own hot attributes are slotted; _attr_* must stay on the class chain.
+    __slots__ = ("_command_queue", "_device_id")
+
     def __init__(
         self,
         coordinator: QwikSwitchDataUpdateCoordinator,
@@ -37,17 +42,17 @@ class QwikSwitchBaseEntity(CoordinatorEntity[QwikSwitchDataUpdateCoordinator]):
         :param name: Friendly name
         :param entity_suffix: Optional suffix (e.g., "light_", "switch_") for unique_id
         """
-        super().__init__(coordinator)
-        self._device_id = device_id
+        # Interned to match the coordinator's data_by_id keys, so lookups hit
+        # the identity fast path instead of a full string compare.
+        self._device_id = sys.intern(device_id)
+        # The device id is the listener context: the coordinator only calls
+        # back entities whose device changed in the latest poll.
+        super().__init__(coordinator, context=self._device_id)
         self._attr_name = name
         self._command_queue = command_queue
 
         # A single place for your entity's unique ID
-        self._attr_unique_id = f"qwikswitch_{entity_suffix}{device_id}"
-
-        # We'll store an "optimistic" value (0..100 for dimmers/switches).
-        # If None, we rely on the polled data from the coordinator.
-        self._optimistic_value: int | None = None
+        self._attr_unique_id = _UNIQUE_ID_PREFIX + entity_suffix + self._device_id
 
     def _find_status(self) -> DeviceStatus | None:
         """
@@ -55,33 +60,15 @@ class QwikSwitchBaseEntity(CoordinatorEntity[QwikSwitchDataUpdateCoordinator]):
 
         :return: The matching DeviceStatus, or None if not found
         """
-        if not self.coordinator.data:
-            return None
-        for status in self.coordinator.data:
-            if status.device_id == self._device_id:
-                return status
-        return None
-
-    def control_device_optimistic(self, level: int) -> None:
+        return self.coordinator.data_by_id.get(self._device_id)
+
+    @callback
+    def async_control_device_optimistic(self, level: int) -> None:
         """Send a command to the device and set an optimistic value so the UI reflects the change immediately."""  # noqa: E501
-        self.hass.create_task(
-            self._command_queue.enqueue_set_device(self._device_id, level)
-        )
-
-        # Optimistically store this level and update the HA state
-        self._optimistic_value = level
-        self.schedule_update_ha_state()
-
-    def _handle_coordinator_update(self) -> None:
-        """Reconcile the polled device value with our optimistic assumption. If they differ, discard the assumption."""  # noqa: E501
-        dev_status = self._find_status()
-        if (
-            dev_status
-            and self._optimistic_value is not None
-            and dev_status.value != self._optimistic_value
-        ):
-            # The real polled value disagrees with our assumption
-            self._optimistic_value = None
-
-        # Call the parent to do normal coordinator update tasks
-        super()._handle_coordinator_update()
+        self._command_queue.enqueue_set_device(self._device_id, level)
+
+        # Optimistically record the level on the coordinator's data; the next
+        # poll confirms or corrects it. We are already on the event loop, so
+        # write the HA state directly.
+        self.coordinator.async_set_device_value(self._device_id, level)
+        self.async_write_ha_state()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.components.light import LightEntity
 from homeassistant.components.light.const import ColorMode
@@ -12,8 +12,6 @@ from qwikswitchapi.constants import DeviceClass
 
 from .command_queue import QwikSwitchCommandQueue
 from .const import (
-    DATA_COMMAND_QUEUE,
-    DATA_QS_COORDINATOR,
     DOMAIN,
     MANUFACTURER,
     MODEL_DIMMER,
@@ -21,17 +19,29 @@ from .const import (
 from .entity import QwikSwitchBaseEntity
 
 if TYPE_CHECKING:
-    from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
     from .command_queue import QwikSwitchCommandQueue
     from .coordinator import QwikSwitchDataUpdateCoordinator
+    from .data import QwikSwitchConfigEntry
+
+_NAME_PREFIX: Final = "QwikSwitch Dimmer "
+
+# Precomputed conversions between the device level (0..100) and HA brightness
+# (0..255), so property reads are a single tuple index instead of float math.
+# Integer round-half-up (rather than truncating) keeps the round trip stable:
+# 100 -> 255 -> 100.
+_LEVEL_TO_BRIGHTNESS: Final = tuple((level * 255 + 50) // 100 for level in range(101))
+_BRIGHTNESS_TO_LEVEL: Final = tuple(
+    (brightness * 100 + 127) // 255 for brightness in range(256)
+)
+_MAX_LEVEL: Final = 100
 
 
 async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,  # noqa: ARG001
+    hass: HomeAssistant,  # noqa: ARG001
+    entry: QwikSwitchConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """
@@ -41,24 +51,18 @@ async def async_setup_entry(
     :param entry: Config entry
     :param async_add_entities: Callback to add entities
     """
-    coordinator: QwikSwitchDataUpdateCoordinator = hass.data[DOMAIN][
-        DATA_QS_COORDINATOR
-    ]
-    queue: QwikSwitchCommandQueue = hass.data[DOMAIN][DATA_COMMAND_QUEUE]
+    coordinator = entry.runtime_data.coordinator
+    queue = entry.runtime_data.command_queue
 
-    devices: list[QwikSwitchLight] = [
+    async_add_entities(
         QwikSwitchLight(
             coordinator=coordinator,
             command_queue=queue,
             device_id=dev_status.device_id,
-            name=f"QwikSwitch Dimmer {dev_status.device_id}",
+            name=_NAME_PREFIX + dev_status.device_id,
         )
-        for dev_status in coordinator.data
-        if dev_status.device_class == DeviceClass.dimmer
-    ]
-
-    if devices:
-        async_add_entities(devices)
+        for dev_status in coordinator.by_class.get(DeviceClass.dimmer, ())
+    )
 
 
 class QwikSwitchLight(QwikSwitchBaseEntity, LightEntity):
@@ -85,6 +89,13 @@ class QwikSwitchLight(QwikSwitchBaseEntity, LightEntity):
 
         self._attr_color_mode = ColorMode.BRIGHTNESS
         self._attr_supported_color_modes = {ColorMode.BRIGHTNESS}
+        # Device registry information, built once rather than on every read.
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._device_id)},
+            name=name,
+            manufacturer=MANUFACTURER,
+            model=MODEL_DIMMER,
+        )
 
     @property
     def is_on(self) -> bool:
@@ -93,11 +104,7 @@ class QwikSwitchLight(QwikSwitchBaseEntity, LightEntity):
 
         :return: True if value > 0, else False
         """
-        if self._optimistic_value is not None:
-            return self._optimistic_value > 0
-
-        dev_status = self._find_status()
-        return dev_status.value > 0 if dev_status else False
+        return (dev_status := self._find_status()) is not None and dev_status.value > 0
 
     @property
     def brightness(self) -> int | None:
@@ -106,37 +113,21 @@ class QwikSwitchLight(QwikSwitchBaseEntity, LightEntity):
 
         :return: brightness in 0..255, or None if unavailable
         """
-        level = self._optimistic_value
-
-        if level is None:
-            dev_status = self._find_status()
-            if not dev_status:
-                return None
-            level = dev_status.value
-
-        # Convert from [0..100] to [0..255]
-        return int((level / 100) * 255)
+        dev_status = self._find_status()
+        if not dev_status:
+            return None
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device registry information so this entity is associated with a device in Home Assistant."""  # noqa: E501
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device_id)},
-            name=self._attr_name,
-            manufacturer=MANUFACTURER,
-            model=MODEL_DIMMER,
-        )
+        # Convert from [0..100] to [0..255], clamping a stray device level
+        return _LEVEL_TO_BRIGHTNESS[min(max(dev_status.value, 0), _MAX_LEVEL)]
 
-    def turn_on(self, **kwargs) -> None:  # noqa: ANN003
+    async def async_turn_on(self, brightness: int = 255, **_: Any) -> None:
         """
         Turn on the light.
 
         If brightness specified, use it; else default to 255 (~100%).
         """
-        brightness: int = kwargs.get("brightness", 255)
-        level = int((brightness / 255) * 100)
-        self.control_device_optimistic(level)
+        self.async_control_device_optimistic(_BRIGHTNESS_TO_LEVEL[brightness])
 
-    def turn_off(self, **kwargs) -> None:  # noqa: ANN003, ARG002
+    async def async_turn_off(self, **_: Any) -> None:
         """Turn off the light (set value to 0)."""
-        self.control_device_optimistic(0)
+        self.async_control_device_optimistic(0)
@@ -2,15 +2,13 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.device_registry import DeviceInfo
 from qwikswitchapi.constants import DeviceClass
 
 from .const import (
-    DATA_COMMAND_QUEUE,
-    DATA_QS_COORDINATOR,
     DOMAIN,
     MANUFACTURER,
     MODEL_RELAY,
@@ -18,18 +16,20 @@ from .const import (
 from .entity import QwikSwitchBaseEntity
 
 if TYPE_CHECKING:
-    from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
-    from qwikswitchapi.entities import DeviceStatus
 
     from .command_queue import QwikSwitchCommandQueue
     from .coordinator import QwikSwitchDataUpdateCoordinator
+    from .data import QwikSwitchConfigEntry
+
+
+_NAME_PREFIX: Final = "QwikSwitch Relay "
 
 
 async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,  # noqa: ARG001
+    hass: HomeAssistant,  # noqa: ARG001
+    entry: QwikSwitchConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """
@@ -39,26 +39,18 @@ async def async_setup_entry(
     :param entry: Config entry
     :param async_add_entities: Callback to add entities.
     """
-    coordinator: QwikSwitchDataUpdateCoordinator = hass.data[DOMAIN][
-        DATA_QS_COORDINATOR
-    ]
-    queue: QwikSwitchCommandQueue = hass.data[DOMAIN][DATA_COMMAND_QUEUE]
+    coordinator = entry.runtime_data.coordinator
+    queue = entry.runtime_data.command_queue
 
-    all_statuses: list[DeviceStatus] = coordinator.data
-
-    switches: list[QwikSwitchRelay] = [
+    async_add_entities(
         QwikSwitchRelay(
             coordinator=coordinator,
             command_queue=queue,
             device_id=dev_status.device_id,
-            name=f"QwikSwitch Relay {dev_status.device_id}",
+            name=_NAME_PREFIX + dev_status.device_id,
         )
-        for dev_status in all_statuses
-        if dev_status.device_class == DeviceClass.relay
-    ]
-
-    if switches:
-        async_add_entities(switches)
+        for dev_status in coordinator.by_class.get(DeviceClass.relay, ())
+    )
 
 
 class QwikSwitchRelay(QwikSwitchBaseEntity, SwitchEntity):
@@ -86,6 +78,13 @@ class QwikSwitchRelay(QwikSwitchBaseEntity, SwitchEntity):
             name,
             entity_suffix="switch_",
         )
+        # Device registry information, built once rather than on every read.
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._device_id)},
+            name=name,
+            manufacturer=MANUFACTURER,
+            model=MODEL_RELAY,
+        )
 
     @property
     def is_on(self) -> bool:
@@ -94,26 +93,12 @@ class QwikSwitchRelay(QwikSwitchBaseEntity, SwitchEntity):
 
         :return: True if value > 0, else False
         """
-        if self._optimistic_value is not None:
-            return self._optimistic_value > 0
-
-        dev_status = self._find_status()
-        return dev_status.value > 0 if dev_status else False
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device registry information so this entity is associated with a device in Home Assistant."""  # noqa: E501
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device_id)},
-            name=self._attr_name,
-            manufacturer=MANUFACTURER,
-            model=MODEL_RELAY,
-        )
+        return (dev_status := self._find_status()) is not None and dev_status.value > 0
 
-    def turn_on(self, **kwargs) -> None:  # noqa: ANN003, ARG002
+    async def async_turn_on(self, **_: Any) -> None:
         """Turn the relay on (value=100)."""
-        self.control_device_optimistic(100)
+        self.async_control_device_optimistic(100)
 
-    def turn_off(self, **kwargs) -> None:  # noqa: ANN003, ARG002
+    async def async_turn_off(self, **_: Any) -> None:
         """Turn the relay off (value=0)."""
-        self.control_device_optimistic(0)
+        self.async_control_device_optimistic(0)
@@ -9,12 +9,16 @@ from unittest.mock import MagicMock
 
 import pytest
 from qwikswitchapi.entities import DeviceStatuses
-from qwikswitchapi.exceptions import QSError
+from qwikswitchapi.exceptions import (
+    QSError,
+    QSRequestError,
+    QSRequestFailedError,
+    QSResponseParseError,
+)
 
 from custom_components.qwikswitch_api.command_queue import (
-    KEY_FUT,
-    KEY_LEVEL,
-    PRIORITY_POLL,
+    INTERVAL_STEP,
+    SET_DEVICE_ATTEMPTS,
     Command,
     CommandType,
     QwikSwitchCommandQueue,
@@ -43,21 +47,33 @@ async def queue(
     hass: HomeAssistant, qs_client: MagicMock
 ) -> AsyncGenerator[QwikSwitchCommandQueue]:
     """
-    Build a command queue with zero delay (no sleeping between commands).
+    Build a command queue with zero delays (no sleep or coalescing window).
 
     On teardown the background processing task is stopped and awaited so it
     does not linger past the test.
     """
-    command_queue = QwikSwitchCommandQueue(qs_client, hass, command_delay=0)
+    command_queue = QwikSwitchCommandQueue(
+        qs_client, hass, command_delay=0, coalesce_delay=0
+    )
     yield command_queue
+    await _stop(command_queue)
+
 
-    task = command_queue._processing_task
-    command_queue.stop()
+async def _stop(queue: QwikSwitchCommandQueue) -> None:
+    """Stop a queue's processing task and wait for it to finish."""
+    task = queue._processing_task
+    queue.stop()
     if task is not None:
         with contextlib.suppress(asyncio.CancelledError):
             await task
 
 
+def _flush_now(queue: QwikSwitchCommandQueue, device_id: str) -> None:
+    """Close a device's coalescing window immediately, queueing its command."""
+    queue._coalesce_handles[device_id].cancel()
+    queue._flush_device(device_id)
+
+
 def test_start_is_idempotent(queue: QwikSwitchCommandQueue) -> None:
     """Calling start twice reuses the same processing task."""
     queue.start()
@@ -74,17 +90,74 @@ def test_stop_without_start_is_safe(queue: QwikSwitchCommandQueue) -> None:
     assert queue._processing_task is None
 
 
-async def test_enqueue_set_device_debounces(
+async def test_enqueue_set_device_coalesces_burst(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """Calls within the coalescing window collapse into one command."""
+    queue.enqueue_set_device("relay-1", 50)
+    queue.enqueue_set_device("relay-1", 80)
+
+    # Nothing is queued until the window closes; only the latest level is kept.
+    assert not queue._commands
+    assert queue._latest_levels == {"relay-1": 80}
+    assert list(queue._coalesce_handles) == ["relay-1"]
+
+    queue.start()
+    await queue.async_wait_idle()
+
+    qs_client.control_device.assert_called_once_with("relay-1", 80)
+    assert not queue._coalesce_handles
+
+
+async def test_enqueue_set_device_updates_queued_command(
     queue: QwikSwitchCommandQueue,
 ) -> None:
-    """A second command for the same device updates the pending one in place."""
-    await queue.enqueue_set_device("relay-1", 50)
-    await queue.enqueue_set_device("relay-1", 80)
+    """A call for a device with a queued command updates that command in place."""
+    queue.enqueue_set_device("relay-1", 50)
+    _flush_now(queue, "relay-1")
+
+    queue.enqueue_set_device("relay-1", 80)
 
     # Only one queued item; the pending command reflects the latest level.
-    assert queue._queue.qsize() == 1
-    pending = queue._pending_commands[(CommandType.SET_DEVICE, "relay-1")]
-    assert pending.data[KEY_LEVEL] == 80
+    assert len(queue._commands) == 1
+    assert not queue._coalesce_handles
+    pending = queue._queued_commands["relay-1"]
+    assert pending.level == 80
+
+
+async def test_level_debounced_into_retry_resets_attempts(
+    queue: QwikSwitchCommandQueue,
+) -> None:
+    """A new level debounced into a queued retry gets the full retry budget."""
+    cmd = Command(
+        cmd_type=CommandType.SET_DEVICE,
+        device_id="relay-1",
+        level=50,
+        attempt=SET_DEVICE_ATTEMPTS - 1,
+    )
+    queue._retry_handles["relay-1"] = MagicMock()
+    queue._retry_device(cmd)
+
+    queue.enqueue_set_device("relay-1", 80)
+
+    assert cmd.level == 80
+    assert cmd.attempt == 0
+
+
+async def test_stop_cancels_coalescing_window(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """Stopping the queue drops set-device calls still waiting to be queued."""
+    queue.enqueue_set_device("relay-1", 50)
+    handle = queue._coalesce_handles["relay-1"]
+
+    queue.stop()
+
+    assert handle.cancelled()
+    assert not queue._latest_levels
+    qs_client.control_device.assert_not_called()
 
 
 async def test_set_device_calls_client(
@@ -93,11 +166,50 @@ async def test_set_device_calls_client(
 ) -> None:
     """A processed set-device command calls the client and clears pending state."""
     queue.start()
-    await queue.enqueue_set_device("relay-1", 42)
-    await queue._queue.join()
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
 
     qs_client.control_device.assert_called_once_with("relay-1", 42)
-    assert (CommandType.SET_DEVICE, "relay-1") not in queue._pending_commands
+    assert "relay-1" not in queue._queued_commands
+
+
+async def test_command_delay_only_spaces_consecutive_calls(
+    hass: HomeAssistant,
+    qs_client: MagicMock,
+) -> None:
+    """An idle queue dispatches at once; the next call waits for the interval."""
+    queue = QwikSwitchCommandQueue(qs_client, hass, command_delay=60, coalesce_delay=0)
+    queue.start()
+    before = hass.loop.time()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+    await _stop(queue)
+
+    # The first call did not wait out the 60s delay...
+    qs_client.control_device.assert_called_once_with("relay-1", 42)
+    # ...but the next one may not start until 60s after it.
+    assert queue._next_dispatch >= before + 60
+
+
+async def test_level_requested_during_send_gets_own_command(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A level requested while a command is being sent is not lost."""
+    queue.start()
+    queue.enqueue_set_device("relay-1", 50)
+    _flush_now(queue, "relay-1")
+    await asyncio.sleep(0)  # let the loop dequeue the command and start sending
+
+    assert "relay-1" not in queue._queued_commands
+    queue.enqueue_set_device("relay-1", 80)
+    await queue.async_wait_idle()
+
+    assert [call.args for call in qs_client.control_device.call_args_list] == [
+        ("relay-1", 50),
+        ("relay-1", 80),
+    ]
 
 
 async def test_set_device_error_is_swallowed(
@@ -108,14 +220,236 @@ async def test_set_device_error_is_swallowed(
     qs_client.control_device.side_effect = QSError("boom")
     queue.start()
 
-    await queue.enqueue_set_device("relay-1", 42)
-    await queue._queue.join()
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
 
     qs_client.control_device.assert_called_once()
     # The processing task keeps running after a command error.
     assert not queue._processing_task.done()
 
 
+async def test_device_commands_run_before_polls(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A device command queued after a poll is still processed first."""
+    poll = asyncio.ensure_future(queue.enqueue_poll())
+    await asyncio.sleep(0)  # let the poll reach the queue
+    queue.enqueue_set_device("relay-1", 42)
+    _flush_now(queue, "relay-1")
+
+    queue.start()
+    await poll
+
+    assert [call[0] for call in qs_client.mock_calls] == [
+        "control_device",
+        "get_all_device_status",
+    ]
+
+
+async def test_set_device_retries_transport_failure(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A set-device call that fails in transport is retried."""
+    qs_client.control_device.side_effect = [QSRequestFailedError("timeout"), None]
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    assert qs_client.control_device.call_count == 2
+    qs_client.control_device.assert_called_with("relay-1", 42)
+
+
+def _status_error(status_code: int) -> QSRequestError:
+    """Build the QSRequestError the client raises for an HTTP status."""
+    return QSRequestError(
+        f'Failed to call http://qs/control.  Status code: "{status_code}", body: ""'
+    )
+
+
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+async def test_set_device_retries_rate_limit_and_server_errors(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+    status_code: int,
+) -> None:
+    """A set-device call rejected with a 429 or 5xx is eventually sent."""
+    qs_client.control_device.side_effect = [_status_error(status_code), None]
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    assert qs_client.control_device.call_count == 2
+    qs_client.control_device.assert_called_with("relay-1", 42)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        _status_error(400),
+        # A 200 with success: false or an error body.
+        _status_error(200),
+        QSResponseParseError("bad response"),
+    ],
+)
+async def test_set_device_does_not_retry_rejected_request(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+    error: QSError,
+) -> None:
+    """Client errors, error bodies and unparseable responses are not retried."""
+    qs_client.control_device.side_effect = error
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    qs_client.control_device.assert_called_once()
+
+
+async def test_retry_backoff_does_not_block_other_commands(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """Other queued commands go out while a failed command waits to retry."""
+    qs_client.control_device.side_effect = [_status_error(429), None, None]
+    queue.enqueue_set_device("relay-1", 42)
+    queue.enqueue_set_device("relay-2", 10)
+    _flush_now(queue, "relay-1")
+    _flush_now(queue, "relay-2")
+
+    queue.start()
+    await queue.async_wait_idle()
+
+    assert [call.args for call in qs_client.control_device.call_args_list] == [
+        ("relay-1", 42),
+        ("relay-2", 10),
+        ("relay-1", 42),
+    ]
+
+
+async def test_failed_send_is_not_retried_over_newer_level(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A level requested while a send fails replaces the retry."""
+    qs_client.control_device.side_effect = [_status_error(429), None]
+    queue.start()
+    queue.enqueue_set_device("relay-1", 50)
+    _flush_now(queue, "relay-1")
+    await asyncio.sleep(0)  # let the loop dequeue the command and start sending
+
+    queue.enqueue_set_device("relay-1", 80)
+    _flush_now(queue, "relay-1")
+    await queue.async_wait_idle()
+
+    assert [call.args for call in qs_client.control_device.call_args_list] == [
+        ("relay-1", 50),
+        ("relay-1", 80),
+    ]
+
+
+async def test_pending_retry_is_dropped_for_newer_level(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A retry whose backoff ends after a newer level was requested is dropped."""
+    qs_client.control_device.side_effect = QSRequestFailedError("timeout")
+    queue._interval = 60  # keep the retry waiting
+    stale = Command(cmd_type=CommandType.SET_DEVICE, device_id="relay-1", level=50)
+    await queue._handle_set_device(stale)
+    queue.enqueue_set_device("relay-1", 80)
+    _flush_now(queue, "relay-1")
+
+    queue._retry_handles["relay-1"].cancel()
+    queue._retry_device(stale)
+
+    assert list(queue._commands) == [queue._queued_commands["relay-1"]]
+    assert queue._queued_commands["relay-1"].level == 80
+
+
+async def test_set_device_gives_up_after_attempts(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """Retries stop after SET_DEVICE_ATTEMPTS and the loop keeps running."""
+    qs_client.control_device.side_effect = QSRequestFailedError("timeout")
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    assert qs_client.control_device.call_count == SET_DEVICE_ATTEMPTS
+    assert not queue._processing_task.done()
+
+
+async def test_stop_cancels_pending_retry(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """Stopping the queue cancels a retry that is waiting out its backoff."""
+    qs_client.control_device.side_effect = QSRequestFailedError("timeout")
+    queue._interval = 60  # keep the retry waiting
+    cmd = Command(cmd_type=CommandType.SET_DEVICE, device_id="relay-1", level=42)
+    await queue._handle_set_device(cmd)
+    handle = queue._retry_handles["relay-1"]
+
+    queue.stop()
+
+    assert handle.cancelled()
+    assert not queue._retry_handles
+
+
+async def test_interval_backs_off_on_failure_and_recovers(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """API failures widen the call interval; successes shrink it again."""
+    qs_client.get_all_device_status.side_effect = QSRequestFailedError("timeout")
+    queue.start()
+
+    with pytest.raises(QSRequestFailedError):
+        await queue.enqueue_poll()
+    assert queue._interval == INTERVAL_STEP
+
+    qs_client.get_all_device_status.side_effect = None
+    await queue.enqueue_poll()
+    assert queue._interval == INTERVAL_STEP / 2
+
+
+async def test_interval_backs_off_on_retried_set_device(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A set-device failure that is retried still widens the call interval."""
+    qs_client.control_device.side_effect = [_status_error(429), None]
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    assert qs_client.control_device.call_count == 2
+    # Widened by the 429, then halved by the successful retry.
+    assert queue._interval == INTERVAL_STEP / 2
+
+
+async def test_interval_ignores_rejected_request(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A request the API rejects outright does not widen the call interval."""
+    qs_client.control_device.side_effect = _status_error(400)
+    queue.start()
+
+    queue.enqueue_set_device("relay-1", 42)
+    await queue.async_wait_idle()
+
+    assert queue._interval == 0
+
+
 async def test_enqueue_poll_returns_statuses(
     queue: QwikSwitchCommandQueue,
 ) -> None:
@@ -145,41 +479,72 @@ async def test_duplicate_poll_reuses_pending_future(
 ) -> None:
     """A poll enqueued while one is pending reuses the existing future."""
     fut = hass.loop.create_future()
-    key = (CommandType.POLL, None)
-    queue._pending_commands[key] = Command(
-        cmd_type=CommandType.POLL,
-        device_id=None,
-        data={KEY_FUT: fut},
-        priority=PRIORITY_POLL,
-    )
+    queue._poll_fut = fut
 
     hass.loop.call_soon(fut.set_result, ["sentinel"])
     result = await queue.enqueue_poll()
 
     assert result == ["sentinel"]
     # No new command was queued — the pending one was reused.
-    assert queue._queue.qsize() == 0
+    assert not queue._polls
 
 
-async def test_duplicate_poll_recreates_missing_future(
+async def test_concurrent_polls_share_one_call(
     queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
 ) -> None:
-    """A pending poll with no stored future gets a fresh one created for it."""
-    key = (CommandType.POLL, None)
-    pending = Command(
-        cmd_type=CommandType.POLL,
-        device_id=None,
-        data={},
-        priority=PRIORITY_POLL,
-    )
-    queue._pending_commands[key] = pending
+    """Concurrent pollers get the same result from a single API call."""
+    queue.start()
+
+    first, second = await asyncio.gather(queue.enqueue_poll(), queue.enqueue_poll())
+
+    assert first is second
+    qs_client.get_all_device_status.assert_called_once()
+    assert queue._poll_fut is None
+
+
+async def test_cancelled_poller_does_not_cancel_others(
+    queue: QwikSwitchCommandQueue,
+) -> None:
+    """Cancelling one caller leaves the shared poll running for the rest."""
+    cancelled = asyncio.ensure_future(queue.enqueue_poll())
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await cancelled
+
+    queue.start()
+    statuses = await queue.enqueue_poll()
+
+    assert statuses[0].device_id == "relay-1"
+
+
+async def test_failed_poll_without_callers_is_retrieved(
+    queue: QwikSwitchCommandQueue,
+    qs_client: MagicMock,
+) -> None:
+    """A poll failing after every caller was cancelled leaves no unread error."""
+    qs_client.get_all_device_status.side_effect = QSRequestFailedError("timeout")
+    poller = asyncio.ensure_future(queue.enqueue_poll())
+    await asyncio.sleep(0)  # let the poll reach the queue
+    fut = queue._poll_fut
+    poller.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await poller
+
+    queue.start()
+    await queue.async_wait_idle()
+    await asyncio.sleep(0)  # let the done callbacks run
+
+    # Checked before reading the exception here, which would clear it too.
+    assert not fut._log_traceback
+    assert isinstance(fut.exception(), QSRequestFailedError)
 
-    task = asyncio.ensure_future(queue.enqueue_poll())
-    await asyncio.sleep(0)  # let enqueue_poll create and store the future
 
-    created = pending.data[KEY_FUT]
-    created.set_result(["late"])
-    assert await task == ["late"]
+def test_command_is_slotted() -> None:
+    """Commands carry no per-instance __dict__."""
+    cmd = Command(cmd_type=CommandType.SET_DEVICE, device_id="relay-1", level=42)
+    assert not hasattr(cmd, "__dict__")
 
 
 async def test_handle_set_device_with_none_id_does_not_call_client(
@@ -188,7 +553,7 @@ async def test_handle_set_device_with_none_id_does_not_call_client(
 ) -> None:
     """A set-device command with no device id is a no-op against the client."""
     await queue._handle_set_device(
-        Command(cmd_type=CommandType.SET_DEVICE, device_id=None, data={}, priority=0)
+        Command(cmd_type=CommandType.SET_DEVICE, device_id=None)
     )
 
     qs_client.control_device.assert_not_called()
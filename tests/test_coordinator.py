@@ -2,21 +2,20 @@
 
 from __future__ import annotations
 
+import logging
 from typing import TYPE_CHECKING
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from qwikswitchapi.constants import DeviceClass
+from qwikswitchapi.entities import DeviceStatuses
 
-from custom_components.qwikswitch_api.const import (
-    DATA_COMMAND_QUEUE,
-    DATA_QS_COORDINATOR,
-    DOMAIN,
-)
+from custom_components.qwikswitch_api.coordinator import DeviceStatusList
 
-if TYPE_CHECKING:
-    from unittest.mock import MagicMock
+from .conftest import DIMMER_TYPE, RELAY_TYPE, make_device_status
 
+if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
     from pytest_homeassistant_custom_component.common import MockConfigEntry
 
@@ -26,7 +25,8 @@ async def test_coordinator_first_refresh_populates_data(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """The coordinator's data holds the polled device statuses after setup."""
-    coordinator = hass.data[DOMAIN][DATA_QS_COORDINATOR]
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
 
     assert coordinator.last_update_success is True
     device_ids = {status.device_id for status in coordinator.data}
@@ -38,9 +38,211 @@ async def test_coordinator_update_wraps_errors(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """A poll failure is surfaced as UpdateFailed."""
-    coordinator = hass.data[DOMAIN][DATA_QS_COORDINATOR]
-    queue = hass.data[DOMAIN][DATA_COMMAND_QUEUE]
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    queue = entry.runtime_data.command_queue
     queue.enqueue_poll = AsyncMock(side_effect=RuntimeError("api down"))
 
     with pytest.raises(UpdateFailed):
         await coordinator._async_update_data()
+
+
+async def test_coordinator_indexes_statuses_by_device_id(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """Each refresh rebuilds the device_id -> DeviceStatus index."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+
+    assert set(coordinator.data_by_id) == {"dimmer-1", "relay-1"}
+    for status in coordinator.data:
+        assert coordinator.data_by_id[status.device_id] is status
+
+
+async def test_coordinator_groups_statuses_by_class(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """Each refresh groups statuses by device class for platform setup."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+
+    assert [s.device_id for s in coordinator.by_class[DeviceClass.dimmer]] == [
+        "dimmer-1"
+    ]
+    assert [s.device_id for s in coordinator.by_class[DeviceClass.relay]] == ["relay-1"]
+
+
+def test_device_status_list_compares_by_value() -> None:
+    """Fresh status objects with the same values compare equal."""
+    first = DeviceStatusList([make_device_status("relay-1", 100, rssi=70)])
+    same = DeviceStatusList([make_device_status("relay-1", 100, rssi=40)])
+    changed = DeviceStatusList([make_device_status("relay-1", 0)])
+
+    assert first == same
+    assert first != changed
+
+
+async def test_unchanged_poll_skips_listeners(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """A poll returning the same device values does not notify entities."""
+    mock_client, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    coordinator.async_update_listeners = MagicMock()
+
+    mock_client.get_all_device_status.return_value = DeviceStatuses(
+        [
+            make_device_status("dimmer-1", 40, DIMMER_TYPE),
+            make_device_status("relay-1", 100, RELAY_TYPE),
+        ]
+    )
+    await coordinator.async_refresh()
+    coordinator.async_update_listeners.assert_not_called()
+
+    mock_client.get_all_device_status.return_value = DeviceStatuses(
+        [
+            make_device_status("dimmer-1", 40, DIMMER_TYPE),
+            make_device_status("relay-1", 0, RELAY_TYPE),
+        ]
+    )
+    await coordinator.async_refresh()
+    coordinator.async_update_listeners.assert_called_once()
+
+
+async def test_set_device_value_replaces_status_everywhere(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """An optimistic value is visible through data and both indexes."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    coordinator.async_update_listeners = MagicMock()
+
+    coordinator.async_set_device_value("relay-1", 0)
+
+    status = coordinator.data_by_id["relay-1"]
+    assert status.value == 0
+    assert status.device_class is DeviceClass.relay
+    assert coordinator.data[1] is status
+    assert coordinator.by_class[DeviceClass.relay] == [status]
+    # Only the commanding entity writes state; other listeners are untouched.
+    coordinator.async_update_listeners.assert_not_called()
+
+
+async def test_set_device_value_ignores_unknown_device(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """An optimistic value for a device the coordinator never saw is logged."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+
+    with caplog.at_level(logging.DEBUG):
+        coordinator.async_set_device_value("missing", 50)
+
+    assert "missing" not in coordinator.data_by_id
+    assert "unknown device=missing" in caplog.text
+
+
+async def test_confirming_poll_after_optimistic_value_skips_listeners(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """A poll that agrees with the optimistic value does not notify entities."""
+    mock_client, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    coordinator.async_set_device_value("relay-1", 0)
+    coordinator.async_update_listeners = MagicMock()
+
+    mock_client.get_all_device_status.return_value = DeviceStatuses(
+        [
+            make_device_status("dimmer-1", 40, DIMMER_TYPE),
+            make_device_status("relay-1", 0, RELAY_TYPE),
+        ]
+    )
+    await coordinator.async_refresh()
+
+    coordinator.async_update_listeners.assert_not_called()
+
+
+async def test_changed_ids_tracks_value_changes(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """Only devices whose value changed (or vanished) are marked changed."""
+    mock_client, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    # The first refresh saw every device for the first time.
+    assert coordinator.changed_ids == {"dimmer-1", "relay-1"}
+
+    mock_client.get_all_device_status.return_value = DeviceStatuses(
+        [make_device_status("dimmer-1", 75, DIMMER_TYPE)]
+    )
+    await coordinator.async_refresh()
+
+    assert coordinator.changed_ids == {"dimmer-1", "relay-1"}
+
+    await coordinator.async_refresh()
+
+    assert coordinator.changed_ids == set()
+
+
+async def test_changed_ids_after_failure_marks_everything(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """Recovering from a failed poll marks every device as changed."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    coordinator.last_update_success = False
+
+    await coordinator.async_refresh()
+
+    assert coordinator.changed_ids == {"dimmer-1", "relay-1"}
+
+
+async def test_update_listeners_only_calls_changed_devices(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """Listeners are only called back for devices that changed."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    changed, unchanged, no_context = MagicMock(), MagicMock(), MagicMock()
+    unsubs = [
+        coordinator.async_add_listener(changed, "relay-1"),
+        coordinator.async_add_listener(unchanged, "dimmer-1"),
+        coordinator.async_add_listener(no_context),
+    ]
+    coordinator.changed_ids = {"relay-1"}
+
+    coordinator.async_update_listeners()
+
+    changed.assert_called_once()
+    unchanged.assert_not_called()
+    no_context.assert_called_once()
+
+    for unsub in unsubs:
+        unsub()
+
+
+async def test_update_listeners_calls_everyone_after_failure(
+    hass: HomeAssistant,
+    setup_integration: tuple[MagicMock, MockConfigEntry],
+) -> None:
+    """After a failed refresh every listener is called back."""
+    _, entry = setup_integration
+    coordinator = entry.runtime_data.coordinator
+    listener = MagicMock()
+    unsub = coordinator.async_add_listener(listener, "dimmer-1")
+    coordinator.changed_ids = set()
+    coordinator.last_update_success = False
+
+    coordinator.async_update_listeners()
+
+    listener.assert_called_once()
+    unsub()
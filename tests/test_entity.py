@@ -1,7 +1,8 @@
-"""Unit tests for the shared base entity (optimistic update logic)."""
+"""Unit tests for the shared base entity."""
 
 from __future__ import annotations
 
+import sys
 from unittest.mock import MagicMock
 
 from custom_components.qwikswitch_api.light import QwikSwitchLight
@@ -13,6 +14,7 @@ def _make_entity(*statuses) -> QwikSwitchLight:
     """Build a light entity backed by a mock coordinator holding `statuses`."""
     coordinator = MagicMock()
     coordinator.data = list(statuses)
+    coordinator.data_by_id = {status.device_id: status for status in statuses}
     command_queue = MagicMock()
     return QwikSwitchLight(
         coordinator=coordinator,
@@ -28,6 +30,19 @@ def test_unique_id_uses_suffix() -> None:
     assert entity.unique_id == "qwikswitch_light_dimmer-1"
 
 
+def test_device_id_is_interned() -> None:
+    """The device id is interned so it is the same object as the index keys."""
+    entity = _make_entity()
+    assert entity._device_id is sys.intern("dimmer-1")
+
+
+def test_device_attributes_are_slotted() -> None:
+    """The hot per-device attributes live in slots, not the instance dict."""
+    entity = _make_entity()
+    assert "_device_id" not in entity.__dict__
+    assert "_command_queue" not in entity.__dict__
+
+
 def test_find_status_matches_device() -> None:
     """_find_status returns the status matching this entity's device id."""
     status = make_device_status("dimmer-1", 40, DIMMER_TYPE)
@@ -45,53 +60,24 @@ def test_find_status_returns_none_when_no_data() -> None:
     """_find_status returns None when the coordinator has no data yet."""
     coordinator = MagicMock()
     coordinator.data = None
+    coordinator.data_by_id = {}
     entity = QwikSwitchLight(coordinator, MagicMock(), "dimmer-1", "name")
     assert entity._find_status() is None
 
 
 def test_control_device_optimistic_enqueues_and_updates() -> None:
-    """Sending a level enqueues the command and stores the optimistic value."""
+    """Sending a level enqueues the command and records it on the coordinator."""
     entity = _make_entity()
-    entity.hass = MagicMock()
-    entity.schedule_update_ha_state = MagicMock()
-
-    entity.control_device_optimistic(75)
-
-    assert entity._optimistic_value == 75
-    entity._command_queue.enqueue_set_device.assert_called_once_with("dimmer-1", 75)
-    entity.hass.create_task.assert_called_once()
-    entity.schedule_update_ha_state.assert_called_once()
-
-
-def test_coordinator_update_discards_stale_optimistic() -> None:
-    """A polled value disagreeing with the optimistic value clears it."""
-    entity = _make_entity(make_device_status("dimmer-1", 40, DIMMER_TYPE))
     entity.async_write_ha_state = MagicMock()
-    entity._optimistic_value = 100
 
-    entity._handle_coordinator_update()
+    entity.async_control_device_optimistic(75)
 
-    assert entity._optimistic_value is None
+    entity._command_queue.enqueue_set_device.assert_called_once_with("dimmer-1", 75)
+    entity.coordinator.async_set_device_value.assert_called_once_with("dimmer-1", 75)
     entity.async_write_ha_state.assert_called_once()
 
 
-def test_coordinator_update_keeps_matching_optimistic() -> None:
-    """A polled value equal to the optimistic value keeps the assumption."""
-    entity = _make_entity(make_device_status("dimmer-1", 40, DIMMER_TYPE))
-    entity.async_write_ha_state = MagicMock()
-    entity._optimistic_value = 40
-
-    entity._handle_coordinator_update()
-
-    assert entity._optimistic_value == 40
-
-
-def test_coordinator_update_keeps_optimistic_when_status_missing() -> None:
-    """With no matching status, the optimistic value is retained."""
-    entity = _make_entity(make_device_status("other", 10, DIMMER_TYPE))
-    entity.async_write_ha_state = MagicMock()
-    entity._optimistic_value = 100
-
-    entity._handle_coordinator_update()
-
-    assert entity._optimistic_value == 100
+def test_listener_context_is_device_id() -> None:
+    """The entity registers with the coordinator using its device id."""
+    entity = _make_entity()
+    assert entity.coordinator_context == "dimmer-1"
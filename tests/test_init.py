@@ -16,9 +16,6 @@ from custom_components.qwikswitch_api.const import (
     CONF_MASTER_KEY,
     CONF_POLL_FREQUENCY,
     CONF_VERSION,
-    DATA_COMMAND_QUEUE,
-    DATA_QS_CLIENT,
-    DATA_QS_COORDINATOR,
     DEFAULT_COMMAND_DELAY,
     DOMAIN,
 )
@@ -33,16 +30,17 @@ async def test_setup_entry_success(
     hass: HomeAssistant,
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
-    """A successful setup generates keys, stores data and loads the entry."""
+    """A successful setup generates keys, stores runtime data and loads the entry."""
     mock_client, entry = setup_integration
 
     assert entry.state is ConfigEntryState.LOADED
     mock_client.generate_api_keys.assert_called_once()
 
-    domain_data = hass.data[DOMAIN]
-    assert domain_data[DATA_QS_CLIENT] is mock_client
-    assert DATA_COMMAND_QUEUE in domain_data
-    assert DATA_QS_COORDINATOR in domain_data
+    runtime_data = entry.runtime_data
+    assert runtime_data.client is mock_client
+    assert runtime_data.command_queue is not None
+    assert runtime_data.coordinator.config_entry is entry
+    assert runtime_data.coordinator._command_queue is runtime_data.command_queue
 
 
 async def test_setup_entry_auth_failure(
@@ -65,16 +63,16 @@ async def test_unload_entry_deletes_keys_and_cleans_up(
     hass: HomeAssistant,
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
-    """Unloading deletes API keys and removes all domain data."""
+    """Unloading deletes API keys and stops the command queue."""
     mock_client, entry = setup_integration
+    command_queue = entry.runtime_data.command_queue
 
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
 
     assert entry.state is ConfigEntryState.NOT_LOADED
     mock_client.delete_api_keys.assert_called_once()
-    # Last entry removed -> the whole domain bucket is dropped.
-    assert DOMAIN not in hass.data
+    assert command_queue._processing_task is None
 
 
 async def test_unload_entry_survives_key_delete_error(
@@ -106,7 +104,7 @@ async def test_reload_entry(
     # delete (unload) + regenerate (setup) both happened.
     mock_client.delete_api_keys.assert_called_once()
     assert mock_client.generate_api_keys.call_count == 2
-    assert hass.data[DOMAIN][DATA_QS_CLIENT] is mock_client
+    assert entry.runtime_data.client is mock_client
 
 
 async def test_options_update_triggers_reload(
@@ -126,7 +124,7 @@ async def test_options_update_triggers_reload(
     # A reload re-ran setup (keys regenerated) and rebuilt the coordinator with
     # the new interval.
     assert mock_client.generate_api_keys.call_count == 2
-    coordinator = hass.data[DOMAIN][DATA_QS_COORDINATOR]
+    coordinator = entry.runtime_data.coordinator
     assert coordinator.update_interval == timedelta(seconds=30)
 
 
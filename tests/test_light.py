@@ -7,10 +7,9 @@ from unittest.mock import MagicMock
 
 import pytest
 from homeassistant.components.light import ColorMode
+from qwikswitchapi.constants import DeviceClass
 
 from custom_components.qwikswitch_api.const import (
-    DATA_COMMAND_QUEUE,
-    DATA_QS_COORDINATOR,
     DOMAIN,
     MANUFACTURER,
     MODEL_DIMMER,
@@ -26,13 +25,12 @@ if TYPE_CHECKING:
 DIMMER_ENTITY_ID = "light.qwikswitch_dimmer_dimmer_1"
 
 
-def _make_light(optimistic: int | None = None, *statuses) -> QwikSwitchLight:
-    """Build a dimmer entity with an optional optimistic value."""
+def _make_light(*statuses) -> QwikSwitchLight:
+    """Build a dimmer entity backed by a mock coordinator holding `statuses`."""
     coordinator = MagicMock()
     coordinator.data = list(statuses)
-    light = QwikSwitchLight(coordinator, MagicMock(), "dimmer-1", "name")
-    light._optimistic_value = optimistic
-    return light
+    coordinator.data_by_id = {status.device_id: status for status in statuses}
+    return QwikSwitchLight(coordinator, MagicMock(), "dimmer-1", "name")
 
 
 def test_color_mode_is_brightness() -> None:
@@ -43,55 +41,54 @@ def test_color_mode_is_brightness() -> None:
 
 
 @pytest.mark.parametrize(
-    ("optimistic", "value", "expected"),
+    ("value", "expected"),
     [
-        (None, 40, True),
-        (None, 0, False),
-        (50, None, True),
-        (0, None, False),
+        (40, True),
+        (0, False),
     ],
 )
-def test_is_on(optimistic: int | None, value: int | None, expected: bool) -> None:
-    """is_on reflects the optimistic value first, else the polled value."""
-    statuses = (
-        [make_device_status("dimmer-1", value, DIMMER_TYPE)]
-        if value is not None
-        else []
-    )
-    light = _make_light(optimistic, *statuses)
+def test_is_on(value: int, expected: bool) -> None:
+    """is_on reflects the device value held by the coordinator."""
+    light = _make_light(make_device_status("dimmer-1", value, DIMMER_TYPE))
     assert light.is_on is expected
 
 
 def test_is_on_false_without_status() -> None:
-    """is_on is False when there is neither optimistic nor polled data."""
-    assert _make_light(None).is_on is False
+    """is_on is False when the coordinator has no data for the device."""
+    assert _make_light().is_on is False
 
 
 @pytest.mark.parametrize(
-    ("optimistic", "value", "expected"),
+    ("value", "expected"),
     [
-        (None, 100, 255),
-        (None, 40, 102),
-        (100, None, 255),
-        (0, None, 0),
+        (100, 255),
+        (40, 102),
+        (0, 0),
+        # Out-of-range device levels are clamped rather than raising.
+        (120, 255),
+        (-5, 0),
     ],
 )
-def test_brightness_conversion(
-    optimistic: int | None, value: int | None, expected: int
-) -> None:
+def test_brightness_conversion(value: int, expected: int) -> None:
     """Brightness converts the 0-100 device level to the 0-255 HA scale."""
-    statuses = (
-        [make_device_status("dimmer-1", value, DIMMER_TYPE)]
-        if value is not None
-        else []
-    )
-    light = _make_light(optimistic, *statuses)
+    light = _make_light(make_device_status("dimmer-1", value, DIMMER_TYPE))
     assert light.brightness == expected
 
 
+@pytest.mark.parametrize("level", range(101))
+async def test_level_brightness_round_trip(level: int) -> None:
+    """Every device level survives a brightness round trip unchanged."""
+    light = _make_light(make_device_status("dimmer-1", level, DIMMER_TYPE))
+    light.async_control_device_optimistic = MagicMock()
+
+    await light.async_turn_on(brightness=light.brightness)
+
+    light.async_control_device_optimistic.assert_called_once_with(level)
+
+
 def test_brightness_none_without_status() -> None:
     """Brightness is None when the device has no known level."""
-    assert _make_light(None).brightness is None
+    assert _make_light().brightness is None
 
 
 def test_device_info() -> None:
@@ -100,6 +97,7 @@ def test_device_info() -> None:
     assert info["identifiers"] == {(DOMAIN, "dimmer-1")}
     assert info["manufacturer"] == MANUFACTURER
     assert info["model"] == MODEL_DIMMER
+    assert info["name"] == "name"
 
 
 @pytest.mark.parametrize(
@@ -109,62 +107,56 @@ def test_device_info() -> None:
         ({"brightness": 255}, 100),
         ({"brightness": 128}, 50),
         ({"brightness": 0}, 0),
+        # Other service data (e.g. transition) is accepted and ignored.
+        ({"brightness": 128, "transition": 2}, 50),
     ],
 )
-def test_turn_on_levels(kwargs: dict, expected_level: int) -> None:
+async def test_turn_on_levels(kwargs: dict, expected_level: int) -> None:
     """turn_on converts brightness to a 0-100 level (defaulting to full)."""
     light = _make_light()
-    light.control_device_optimistic = MagicMock()
-    light.turn_on(**kwargs)
-    light.control_device_optimistic.assert_called_once_with(expected_level)
+    light.async_control_device_optimistic = MagicMock()
+    await light.async_turn_on(**kwargs)
+    light.async_control_device_optimistic.assert_called_once_with(expected_level)
 
 
-def test_turn_off() -> None:
+async def test_turn_off() -> None:
     """turn_off requests level 0."""
     light = _make_light()
-    light.control_device_optimistic = MagicMock()
-    light.turn_off()
-    light.control_device_optimistic.assert_called_once_with(0)
+    light.async_control_device_optimistic = MagicMock()
+    await light.async_turn_off()
+    light.async_control_device_optimistic.assert_called_once_with(0)
 
 
 async def test_async_setup_entry_creates_only_dimmers() -> None:
     """Only dimmer-class devices become light entities."""
     coordinator = MagicMock()
-    coordinator.data = [
-        make_device_status("dimmer-1", 40, DIMMER_TYPE),
-        make_device_status("relay-1", 100, RELAY_TYPE),
-    ]
-    hass = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            DATA_QS_COORDINATOR: coordinator,
-            DATA_COMMAND_QUEUE: MagicMock(),
-        }
+    coordinator.by_class = {
+        DeviceClass.dimmer: [make_device_status("dimmer-1", 40, DIMMER_TYPE)],
+        DeviceClass.relay: [make_device_status("relay-1", 100, RELAY_TYPE)],
     }
+    entry = MagicMock()
+    entry.runtime_data.coordinator = coordinator
     added: list[QwikSwitchLight] = []
 
-    await async_setup_entry(hass, MagicMock(), added.extend)
+    await async_setup_entry(MagicMock(), entry, added.extend)
 
     assert len(added) == 1
     assert added[0].unique_id == "qwikswitch_light_dimmer-1"
 
 
 async def test_async_setup_entry_no_dimmers_adds_nothing() -> None:
-    """With no dimmers present, no entities are added."""
+    """With no dimmers present, the platform adds no entities."""
     coordinator = MagicMock()
-    coordinator.data = [make_device_status("relay-1", 100, RELAY_TYPE)]
-    hass = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            DATA_QS_COORDINATOR: coordinator,
-            DATA_COMMAND_QUEUE: MagicMock(),
-        }
+    coordinator.by_class = {
+        DeviceClass.relay: [make_device_status("relay-1", 100, RELAY_TYPE)]
     }
-    add_entities = MagicMock()
+    entry = MagicMock()
+    entry.runtime_data.coordinator = coordinator
+    added: list = []
 
-    await async_setup_entry(hass, MagicMock(), add_entities)
+    await async_setup_entry(MagicMock(), entry, added.extend)
 
-    add_entities.assert_not_called()
+    assert added == []
 
 
 async def test_turn_on_service_calls_client(
@@ -172,7 +164,7 @@ async def test_turn_on_service_calls_client(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """Calling light.turn_on drives the API through the command queue."""
-    mock_client, _ = setup_integration
+    mock_client, entry = setup_integration
 
     await hass.services.async_call(
         "light",
@@ -181,7 +173,7 @@ async def test_turn_on_service_calls_client(
         blocking=True,
     )
     await hass.async_block_till_done()
-    await hass.data[DOMAIN][DATA_COMMAND_QUEUE]._queue.join()
+    await entry.runtime_data.command_queue.async_wait_idle()
 
     mock_client.control_device.assert_any_call("dimmer-1", 100)
 
@@ -191,7 +183,7 @@ async def test_turn_off_service_calls_client(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """Calling light.turn_off drives the API with level 0."""
-    mock_client, _ = setup_integration
+    mock_client, entry = setup_integration
 
     await hass.services.async_call(
         "light",
@@ -200,6 +192,6 @@ async def test_turn_off_service_calls_client(
         blocking=True,
     )
     await hass.async_block_till_done()
-    await hass.data[DOMAIN][DATA_COMMAND_QUEUE]._queue.join()
+    await entry.runtime_data.command_queue.async_wait_idle()
 
     mock_client.control_device.assert_any_call("dimmer-1", 0)
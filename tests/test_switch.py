@@ -6,10 +6,9 @@ from typing import TYPE_CHECKING
 from unittest.mock import MagicMock
 
 import pytest
+from qwikswitchapi.constants import DeviceClass
 
 from custom_components.qwikswitch_api.const import (
-    DATA_COMMAND_QUEUE,
-    DATA_QS_COORDINATOR,
     DOMAIN,
     MANUFACTURER,
     MODEL_RELAY,
@@ -25,36 +24,30 @@ if TYPE_CHECKING:
 RELAY_ENTITY_ID = "switch.qwikswitch_relay_relay_1"
 
 
-def _make_relay(optimistic: int | None = None, *statuses) -> QwikSwitchRelay:
-    """Build a relay entity with an optional optimistic value."""
+def _make_relay(*statuses) -> QwikSwitchRelay:
+    """Build a relay entity backed by a mock coordinator holding `statuses`."""
     coordinator = MagicMock()
     coordinator.data = list(statuses)
-    relay = QwikSwitchRelay(coordinator, MagicMock(), "relay-1", "name")
-    relay._optimistic_value = optimistic
-    return relay
+    coordinator.data_by_id = {status.device_id: status for status in statuses}
+    return QwikSwitchRelay(coordinator, MagicMock(), "relay-1", "name")
 
 
 @pytest.mark.parametrize(
-    ("optimistic", "value", "expected"),
+    ("value", "expected"),
     [
-        (None, 100, True),
-        (None, 0, False),
-        (100, None, True),
-        (0, None, False),
+        (100, True),
+        (0, False),
     ],
 )
-def test_is_on(optimistic: int | None, value: int | None, expected: bool) -> None:
-    """is_on reflects the optimistic value first, else the polled value."""
-    statuses = (
-        [make_device_status("relay-1", value, RELAY_TYPE)] if value is not None else []
-    )
-    relay = _make_relay(optimistic, *statuses)
+def test_is_on(value: int, expected: bool) -> None:
+    """is_on reflects the device value held by the coordinator."""
+    relay = _make_relay(make_device_status("relay-1", value, RELAY_TYPE))
     assert relay.is_on is expected
 
 
 def test_is_on_false_without_status() -> None:
-    """is_on is False when there is neither optimistic nor polled data."""
-    assert _make_relay(None).is_on is False
+    """is_on is False when the coordinator has no data for the device."""
+    assert _make_relay().is_on is False
 
 
 def test_device_info() -> None:
@@ -63,62 +56,55 @@ def test_device_info() -> None:
     assert info["identifiers"] == {(DOMAIN, "relay-1")}
     assert info["manufacturer"] == MANUFACTURER
     assert info["model"] == MODEL_RELAY
+    assert info["name"] == "name"
 
 
-def test_turn_on() -> None:
+async def test_turn_on() -> None:
     """turn_on requests level 100."""
     relay = _make_relay()
-    relay.control_device_optimistic = MagicMock()
-    relay.turn_on()
-    relay.control_device_optimistic.assert_called_once_with(100)
+    relay.async_control_device_optimistic = MagicMock()
+    await relay.async_turn_on()
+    relay.async_control_device_optimistic.assert_called_once_with(100)
 
 
-def test_turn_off() -> None:
+async def test_turn_off() -> None:
     """turn_off requests level 0."""
     relay = _make_relay()
-    relay.control_device_optimistic = MagicMock()
-    relay.turn_off()
-    relay.control_device_optimistic.assert_called_once_with(0)
+    relay.async_control_device_optimistic = MagicMock()
+    await relay.async_turn_off()
+    relay.async_control_device_optimistic.assert_called_once_with(0)
 
 
 async def test_async_setup_entry_creates_only_relays() -> None:
     """Only relay-class devices become switch entities."""
     coordinator = MagicMock()
-    coordinator.data = [
-        make_device_status("dimmer-1", 40, DIMMER_TYPE),
-        make_device_status("relay-1", 100, RELAY_TYPE),
-    ]
-    hass = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            DATA_QS_COORDINATOR: coordinator,
-            DATA_COMMAND_QUEUE: MagicMock(),
-        }
+    coordinator.by_class = {
+        DeviceClass.dimmer: [make_device_status("dimmer-1", 40, DIMMER_TYPE)],
+        DeviceClass.relay: [make_device_status("relay-1", 100, RELAY_TYPE)],
     }
+    entry = MagicMock()
+    entry.runtime_data.coordinator = coordinator
     added: list[QwikSwitchRelay] = []
 
-    await async_setup_entry(hass, MagicMock(), added.extend)
+    await async_setup_entry(MagicMock(), entry, added.extend)
 
     assert len(added) == 1
     assert added[0].unique_id == "qwikswitch_switch_relay-1"
 
 
 async def test_async_setup_entry_no_relays_adds_nothing() -> None:
-    """With no relays present, no entities are added."""
+    """With no relays present, the platform adds no entities."""
     coordinator = MagicMock()
-    coordinator.data = [make_device_status("dimmer-1", 40, DIMMER_TYPE)]
-    hass = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            DATA_QS_COORDINATOR: coordinator,
-            DATA_COMMAND_QUEUE: MagicMock(),
-        }
+    coordinator.by_class = {
+        DeviceClass.dimmer: [make_device_status("dimmer-1", 40, DIMMER_TYPE)]
     }
-    add_entities = MagicMock()
+    entry = MagicMock()
+    entry.runtime_data.coordinator = coordinator
+    added: list = []
 
-    await async_setup_entry(hass, MagicMock(), add_entities)
+    await async_setup_entry(MagicMock(), entry, added.extend)
 
-    add_entities.assert_not_called()
+    assert added == []
 
 
 async def test_turn_on_service_calls_client(
@@ -126,7 +112,7 @@ async def test_turn_on_service_calls_client(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """Calling switch.turn_on drives the API with level 100."""
-    mock_client, _ = setup_integration
+    mock_client, entry = setup_integration
 
     await hass.services.async_call(
         "switch",
@@ -135,7 +121,7 @@ async def test_turn_on_service_calls_client(
         blocking=True,
     )
     await hass.async_block_till_done()
-    await hass.data[DOMAIN][DATA_COMMAND_QUEUE]._queue.join()
+    await entry.runtime_data.command_queue.async_wait_idle()
 
     mock_client.control_device.assert_any_call("relay-1", 100)
 
@@ -145,7 +131,7 @@ async def test_turn_off_service_calls_client(
     setup_integration: tuple[MagicMock, MockConfigEntry],
 ) -> None:
     """Calling switch.turn_off drives the API with level 0."""
-    mock_client, _ = setup_integration
+    mock_client, entry = setup_integration
 
     await hass.services.async_call(
         "switch",
@@ -154,6 +140,6 @@ async def test_turn_off_service_calls_client(
         blocking=True,
     )
     await hass.async_block_till_done()
-    await hass.data[DOMAIN][DATA_COMMAND_QUEUE]._queue.join()
+    await entry.runtime_data.command_queue.async_wait_idle()
 
     mock_client.control_device.assert_any_call("relay-1", 0)